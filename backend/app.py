@@ -3,11 +3,15 @@
 import pandas as pd
 import numpy as np
 import joblib
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-from fuzzywuzzy import process
+from rapidfuzz import process, fuzz
+from rapidfuzz.utils import default_process
 import os
-from scipy.sparse import issparse
+import functools
+import orjson
+from scipy.sparse import issparse, csr_matrix
+from export_similarity_matrix import SIMILARITY_MATRIX_PATH, SIMILARITY_CSR_PATH_TEMPLATE
 
 app = Flask(__name__)
 CORS(app,resources={
@@ -22,12 +26,267 @@ CORS(app,resources={
 # --- Global Variables for Model and Data ---
 preprocessed_df = None
 similarity_models = None
+similarity_matrix = None  # similarity_models["similarity_matrix"], validated at load
+similarity_matrix_is_sparse = False
+similarity_matrix_rows = 0
 cleaned_df = None  # To store the clean dataset with ratings
+preprocessed_titles = None  # Title choices for fuzzy matching, built once at load
+cleaned_titles = None
+preprocessed_normalized_titles = None  # Titles passed through default_process
+cleaned_normalized_titles = None
+preprocessed_title_lookup = None  # Normalized title -> title, for exact matches
+cleaned_title_lookup = None
+title_to_pos = None  # Title -> positional index in preprocessed_df
+recommendation_column_positions = None  # Positions of response columns in preprocessed_df
+cleaned_by_title = None  # Clean dataset info columns indexed by title
+drama_records = None  # Response fields per preprocessed_df position, joined at load
+top_neighbor_indices = None  # Precomputed nearest neighbors for each drama
+top_neighbor_scores = None
+precomputed_responses = None  # Normalized title -> encoded default response body
+
+# Minimum fuzzy match score to accept a title
+MATCH_THRESHOLD = 80
+
+# Number of nearest neighbors precomputed per drama at load
+TOP_K_NEIGHBORS = 50
+
+# Number of recommendations returned when the request does not specify one
+DEFAULT_N_RECOMMENDATIONS = 5
+
+# Maximum number of (title, n_recommendations) results cached per process
+RECOMMENDATION_CACHE_SIZE = 4096
+
+# orjson options for response bodies: sorted keys match jsonify's output,
+# and numpy scalars are encoded natively
+ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Columns taken from the clean dataset to enrich recommendations
+INFO_COLUMNS = ['rating', 'genres', 'original_network']
+
+# Low-cardinality string columns stored as pandas Categorical
+CATEGORICAL_COLUMNS = ['content_rating', 'genres', 'original_network']
 
 # --- Configuration ---
 MODEL_PATH = "../data/drama_recommender_v2.joblib"
 PREPROCESSED_DF_PATH = "../data/final_preprocessed_df.pkl"
 CLEAN_DRAMA_PATH = "../data/clean_drama_dataset.pkl"
+# Raw .npy exports of the similarity matrix; the paths are defined in
+# export_similarity_matrix.py, which writes them
+SIMILARITY_CSR_PATHS = {
+    part: SIMILARITY_CSR_PATH_TEMPLATE.format(part) for part in ("data", "indices", "indptr")
+}
+
+# --- Helper Function to Load the Exported Similarity Matrix ---
+def load_similarity_matrix_npy(expected_rows=None):
+    """
+    Memory-maps the similarity matrix from its .npy export.
+    Returns a dense array or a CSR matrix, or None if no export exists, if it
+    is older than MODEL_PATH, or if it does not have expected_rows rows.
+    """
+    if os.path.exists(SIMILARITY_MATRIX_PATH):
+        paths = [SIMILARITY_MATRIX_PATH]
+    elif all(os.path.exists(path) for path in SIMILARITY_CSR_PATHS.values()):
+        paths = list(SIMILARITY_CSR_PATHS.values())
+    else:
+        return None
+
+    if os.path.exists(MODEL_PATH) and any(
+        os.path.getmtime(path) < os.path.getmtime(MODEL_PATH) for path in paths
+    ):
+        print(
+            f"Warning: similarity matrix export is older than {MODEL_PATH}, ignoring it. "
+            "Re-run export_similarity_matrix.py to refresh it."
+        )
+        return None
+
+    if len(paths) == 1:
+        matrix = np.load(SIMILARITY_MATRIX_PATH, mmap_mode="r")
+    else:
+        data, indices, indptr = (
+            np.load(SIMILARITY_CSR_PATHS[part], mmap_mode="r")
+            for part in ("data", "indices", "indptr")
+        )
+        n_rows = indptr.shape[0] - 1
+        matrix = csr_matrix((data, indices, indptr), shape=(n_rows, n_rows))
+
+    if expected_rows is not None and matrix.shape != (expected_rows, expected_rows):
+        print(
+            f"Warning: similarity matrix export has shape {matrix.shape}, expected "
+            f"({expected_rows}, {expected_rows}) for the preprocessed DataFrame, ignoring it"
+        )
+        return None
+    return matrix
+
+# --- Helper Function to Compact String Columns ---
+def convert_categorical_columns(df):
+    """
+    Converts the string-valued CATEGORICAL_COLUMNS of df to Categorical in place.
+    Columns holding unhashable values (like lists) are left unchanged.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and (
+            pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])
+        ):
+            try:
+                df[col] = df[col].astype('category')
+            except TypeError:
+                print(f"Warning: could not convert column '{col}' to categorical")
+
+# --- Helper Function to Index Titles for Matching ---
+def build_title_lookup(titles):
+    """
+    Normalizes titles with rapidfuzz's default_process.
+    Returns the normalized titles and a dictionary mapping each normalized
+    title to the first title that produced it.
+    """
+    normalized_titles = [default_process(t) for t in titles]
+    lookup = {}
+    for key, t in zip(normalized_titles, titles):
+        if key:
+            lookup.setdefault(key, t)
+    return normalized_titles, lookup
+
+# --- Helper Function to Match a Title ---
+def match_title(title, titles, normalized_titles, lookup, score_cutoff=None):
+    """
+    Finds the closest title, trying an exact match on the normalized title
+    before falling back to fuzzy matching.
+    Returns a (matched_title, score) tuple, or None if no title scores at
+    least score_cutoff.
+    """
+    key = default_process(title)
+    exact_title = lookup.get(key)
+    if exact_title is not None:
+        return exact_title, 100.0
+
+    # Choices are already normalized, so skip the per-choice processor
+    match = process.extractOne(
+        key, normalized_titles, scorer=fuzz.WRatio, processor=None, score_cutoff=score_cutoff
+    )
+    if not match:
+        return None
+    _, score, choice_idx = match
+    return titles[choice_idx], score
+
+# --- Helper Function to Match Many Titles at Once ---
+def match_titles(titles, choices, normalized_choices, lookup, score_cutoff, batch_size=256):
+    """
+    Batch version of match_title: exact matches come from the lookup and the
+    rest are scored together with rapidfuzz's cdist, batch_size rows at a time.
+    Returns a list with a (matched_title, score) tuple, or None if no title
+    scores at least score_cutoff, for each input title.
+    """
+    keys = [default_process(t) for t in titles]
+    matches = [None] * len(keys)
+    pending = []
+    for i, key in enumerate(keys):
+        exact_title = lookup.get(key)
+        if exact_title is not None:
+            matches[i] = (exact_title, 100.0)
+        else:
+            pending.append(i)
+
+    if not normalized_choices:
+        return matches
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        scores = process.cdist(
+            [keys[i] for i in batch],
+            normalized_choices,
+            scorer=fuzz.WRatio,
+            processor=None,
+            score_cutoff=score_cutoff,
+            workers=-1,
+        )
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(batch)), best]
+        for i, choice_idx, score in zip(batch, best.tolist(), best_scores.tolist()):
+            if score >= score_cutoff:
+                matches[i] = (choices[choice_idx], score)
+
+    return matches
+
+# --- Helper Functions for Top-K Selection ---
+def get_similarity_row(pos_idx):
+    """
+    Returns one row of the loaded similarity matrix as a contiguous 1-D array.
+    Sparse matrices densify only the requested row.
+    """
+    row = similarity_matrix[pos_idx]
+    if similarity_matrix_is_sparse:
+        row = row.toarray()
+    return np.ascontiguousarray(row).ravel()
+
+
+def select_top_k(scores, k):
+    """
+    Returns the positions of the k highest scores, best first, with ties
+    broken by position. Requires 0 < k <= len(scores).
+    """
+    # Partially sort for the k-th best score, then order every candidate
+    # scoring at least that by score
+    kth_score = -np.partition(-scores, k - 1)[k - 1]
+    candidates = np.flatnonzero(scores >= kth_score)
+    return candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+
+
+def top_k_row(row, k, exclude_idx):
+    """
+    Finds the k highest scores in a similarity row, excluding exclude_idx.
+    Returns (indices, scores) arrays, best match first.
+    """
+    k = min(k, row.shape[0] - 1)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), row[:0]
+
+    # Mask the excluded drama so it can never be selected, whatever its score
+    row = row.copy()
+    row[exclude_idx] = -np.inf
+    top_indices = select_top_k(row, k)
+    return top_indices, row[top_indices]
+
+# --- Helper Function to Precompute Nearest Neighbors ---
+def compute_top_neighbors(matrix, k, block_size=1024):
+    """
+    Finds the k most similar dramas for every row of the similarity matrix.
+    Returns (indices, scores) arrays of shape (n_rows, k), best match first,
+    with each drama excluded from its own neighbors.
+    """
+    n_rows = matrix.shape[0]
+    k = max(min(k, n_rows - 1), 0)
+    top_indices = np.empty((n_rows, k), dtype=np.int64)
+    top_scores = np.empty((n_rows, k), dtype=np.float32)
+    if k == 0:
+        return top_indices, top_scores
+
+    # Work in row blocks to bound the temporary memory used
+    for start in range(0, n_rows, block_size):
+        stop = min(start + block_size, n_rows)
+        block = matrix[start:stop]
+        block = block.toarray() if issparse(block) else np.array(block)
+        block = block.astype(np.float32, copy=False)
+
+        rows = np.arange(stop - start)
+        block[rows, rows + start] = -np.inf
+
+        # Partially sort each row, then order the k candidates by score with
+        # ties broken by position, as in select_top_k
+        part = np.sort(np.argpartition(-block, k - 1, axis=1)[:, :k], axis=1)
+        part_scores = np.take_along_axis(block, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind="stable")
+        indices = np.take_along_axis(part, order, axis=1)
+
+        # Rows with more ties at the k-th score than fit may have kept the
+        # wrong ones, so reselect those individually
+        kth_scores = np.take_along_axis(part_scores, order[:, -1:], axis=1)
+        for r in np.flatnonzero((block >= kth_scores).sum(axis=1) > k):
+            indices[r] = select_top_k(block[r], k)
+
+        top_indices[start:stop] = indices
+        top_scores[start:stop] = np.take_along_axis(block, indices, axis=1)
+
+    return top_indices, top_scores
 
 # --- Helper Function to Load Model and Data ---
 def load_resources():
@@ -35,6 +294,22 @@ def load_resources():
     Loads the preprocessed DataFrame and similarity models into global variables.
     """
     global preprocessed_df, similarity_models, cleaned_df
+    global preprocessed_titles, cleaned_titles, title_to_pos, cleaned_by_title
+    global preprocessed_normalized_titles, cleaned_normalized_titles
+    global preprocessed_title_lookup, cleaned_title_lookup
+    global top_neighbor_indices, top_neighbor_scores, recommendation_column_positions
+    global precomputed_responses, drama_records
+    global similarity_matrix, similarity_matrix_is_sparse, similarity_matrix_rows
+
+    # Lookups derived from the data are rebuilt on every load, so none of
+    # them outlive a dataset that fails to load
+    preprocessed_titles = preprocessed_normalized_titles = preprocessed_title_lookup = None
+    cleaned_titles = cleaned_normalized_titles = cleaned_title_lookup = None
+    title_to_pos = recommendation_column_positions = cleaned_by_title = None
+    drama_records = None
+    top_neighbor_indices = top_neighbor_scores = None
+    precomputed_responses = None
+    similarity_matrix, similarity_matrix_is_sparse, similarity_matrix_rows = None, False, 0
 
     print("Loading resources...")
     try:
@@ -48,6 +323,21 @@ def load_resources():
                 f"DataFrame index range: {preprocessed_df.index.min()} to {preprocessed_df.index.max()}"
             )
             print("Available columns in preprocessed_df:", preprocessed_df.columns.tolist())
+            convert_categorical_columns(preprocessed_df)
+            if "title" in preprocessed_df.columns:
+                preprocessed_titles = preprocessed_df["title"].tolist()
+                preprocessed_normalized_titles, preprocessed_title_lookup = (
+                    build_title_lookup(preprocessed_titles)
+                )
+                # Keep the first occurrence of duplicated titles
+                title_to_pos = {}
+                for i, t in enumerate(preprocessed_titles):
+                    title_to_pos.setdefault(t, i)
+                recommendation_column_positions = [
+                    preprocessed_df.columns.get_loc(c)
+                    for c in ("title", "content_rating")
+                    if c in preprocessed_df.columns
+                ]
         else:
             print(f"Error: Preprocessed DataFrame not found at {PREPROCESSED_DF_PATH}")
             preprocessed_df = None
@@ -61,13 +351,31 @@ def load_resources():
             # Make sure we have the expected columns
             if 'rating' not in cleaned_df.columns:
                 print("Warning: 'rating' column not found in clean dataset")
+            convert_categorical_columns(cleaned_df)
+            cleaned_titles = cleaned_df['title'].tolist()
+            cleaned_normalized_titles, cleaned_title_lookup = build_title_lookup(cleaned_titles)
+            info_columns = [c for c in INFO_COLUMNS if c in cleaned_df.columns]
+            cleaned_by_title = (
+                cleaned_df.drop_duplicates('title').set_index('title')[info_columns]
+            )
         else:
             print(f"Error: Clean dataset not found at {CLEAN_DRAMA_PATH}")
             cleaned_df = None
 
-        # Load similarity models
-        if os.path.exists(MODEL_PATH):
-            loaded_obj = joblib.load(MODEL_PATH)
+        # Load similarity models, preferring the .npy export over the joblib pickle
+        npy_matrix = load_similarity_matrix_npy(
+            len(preprocessed_df) if preprocessed_df is not None else None
+        )
+        if npy_matrix is not None:
+            similarity_models = {"similarity_matrix": npy_matrix}
+            print("\nLoaded similarity matrix from .npy export:")
+            print(f"  Type: {type(npy_matrix)}")
+            print(f"  Shape: {npy_matrix.shape}")
+            print(f"  Sparse: {issparse(npy_matrix)}")
+        elif os.path.exists(MODEL_PATH):
+            # Memory-map arrays so the OS pages them in on demand and worker
+            # processes share one physical copy of the matrix
+            loaded_obj = joblib.load(MODEL_PATH, mmap_mode="r")
 
             if isinstance(loaded_obj, dict):
                 similarity_models = loaded_obj
@@ -90,155 +398,334 @@ def load_resources():
             print(f"Error: Model file not found at {MODEL_PATH}")
             similarity_models = None
 
+        if similarity_models is not None:
+            # Keep sparse matrices in CSR form so single rows can be sliced cheaply
+            matrix = similarity_models.get("similarity_matrix")
+            if issparse(matrix):
+                matrix = matrix.tocsr()
+            # Store scores as float32 to halve memory and row-scan bandwidth
+            if issparse(matrix) and matrix.dtype == np.float64:
+                matrix = matrix.astype(np.float32)
+            # Dense rows must be contiguous float32 for sequential, vectorized reads;
+            # one conversion handles both, and conforming arrays (including memory
+            # maps) are not copied
+            if isinstance(matrix, np.ndarray):
+                matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+                print(f"  C-contiguous float32: {matrix.flags['C_CONTIGUOUS']}")
+            if matrix is not None:
+                similarity_models["similarity_matrix"] = matrix
+                # Resolve the matrix type and size once instead of per request
+                similarity_matrix = matrix
+                similarity_matrix_is_sparse = issparse(matrix)
+                similarity_matrix_rows = matrix.shape[0]
+                top_neighbor_indices, top_neighbor_scores = compute_top_neighbors(
+                    matrix, TOP_K_NEIGHBORS
+                )
+                print(f"Precomputed top {top_neighbor_indices.shape[1]} neighbors per drama")
+
+        # Join the two datasets once so requests never enrich titles themselves
+        if preprocessed_titles is not None and cleaned_by_title is not None:
+            drama_records = build_drama_records()
+            print(f"Joined clean dataset info for {len(drama_records)} dramas")
+
+        # Neighbor positions index drama_records, so the matrix must have one
+        # row per drama for every title's response to be encodable
+        matrix_matches_df = (
+            preprocessed_df is not None and similarity_matrix_rows == len(preprocessed_df)
+        )
+        if similarity_matrix is not None and not matrix_matches_df:
+            print(
+                f"Error: similarity matrix has {similarity_matrix_rows} rows but the preprocessed "
+                f"DataFrame has {len(preprocessed_df) if preprocessed_df is not None else 0}; "
+                "regenerate the model from the same dataset. Skipping precomputed responses."
+            )
+
+        # Pre-encode the default response for every known title
+        if (
+            drama_records is not None
+            and top_neighbor_indices is not None
+            and top_neighbor_indices.shape[1] >= DEFAULT_N_RECOMMENDATIONS
+            and matrix_matches_df
+        ):
+            precomputed_responses = precompute_responses(DEFAULT_N_RECOMMENDATIONS)
+            print(f"Precomputed responses for {len(precomputed_responses)} titles")
+
     except Exception as e:
         print(f"An error occurred during model/data loading: {e}")
         preprocessed_df = None
         similarity_models = None
+        similarity_matrix, similarity_matrix_is_sparse, similarity_matrix_rows = None, False, 0
+        preprocessed_titles = None
+        title_to_pos = None
+        drama_records = None
+        top_neighbor_indices = None
+        top_neighbor_scores = None
+        precomputed_responses = None
 
-
-# Load resources when the app starts
-with app.app_context():
-    load_resources()
+    # Cached recommendations are stale once the data has been reloaded
+    recommend_memoized.cache_clear()
 
 # --- Helper Function to Get Additional Drama Info ---
-def get_additional_drama_info(title):
+def get_additional_drama_infos(titles):
     """
-    Gets additional information (like rating) from the clean dataset for a given title.
-    Returns a dictionary with the additional info or None if not found.
+    Gets additional information (like rating) from the clean dataset for the given titles.
+    Returns a list with a dictionary of additional info, or None if not found, per title.
     """
     if cleaned_df is None:
-        return None
+        return [None] * len(titles)
         
-    # Use fuzzy matching to find the closest title in the clean dataset
-    match = process.extractOne(title, cleaned_df['title'].tolist())
+    # Find the closest titles in the clean dataset in one batch
+    matches = match_titles(
+        titles,
+        cleaned_titles,
+        cleaned_normalized_titles,
+        cleaned_title_lookup,
+        score_cutoff=MATCH_THRESHOLD,  # Only use matches with good confidence
+    )
     
-    if match and match[1] >= 80:  # Only use matches with good confidence
-        matched_title, score = match
-        matched_row = cleaned_df[cleaned_df['title'] == matched_title].iloc[0]
-        
-        # Create info dictionary with available data
-        info = {'title': matched_title}
-        
-        if 'rating' in cleaned_df.columns:
-            info['rating'] = matched_row['rating']
-        if 'genres' in cleaned_df.columns:
-            info['genres'] = matched_row['genres']
-        if 'original_network' in cleaned_df.columns:
-            info['original_network'] = matched_row['original_network']
-            
-        return info
+    infos = []
+    for match in matches:
+        if match:
+            matched_title, score = match
+            # Create info dictionary with available data
+            info = {'title': matched_title}
+            info.update(cleaned_by_title.loc[matched_title].to_dict())
+            infos.append(info)
+        else:
+            infos.append(None)
     
-    return None
+    return infos
 
-# --- Main Recommendation Function ---
-def get_recommendations_backend(title, n_recommendations=5):
+# --- Helper Function to Join the Datasets ---
+def build_drama_records():
+    """
+    Joins every drama in preprocessed_df with its info from the clean dataset,
+    by exact title where possible and by fuzzy matching for the rest.
+    Returns a list of response field dictionaries, one per position in preprocessed_df.
+    """
+    # Take only the response columns from preprocessed data
+    dramas = preprocessed_df.iloc[:, recommendation_column_positions].reset_index(drop=True)
+    if "content_rating" not in dramas.columns:
+        dramas["content_rating"] = None
+
+    # Enrich with data from clean dataset by exact title
+    merged = dramas.merge(cleaned_by_title, how="left", left_on="title", right_index=True)
+    records = merged.to_dict(orient="records")
+
+    # Fall back to fuzzy matching for titles missing from the clean dataset
+    found = dramas["title"].isin(cleaned_by_title.index).tolist()
+    missing_titles = list(dict.fromkeys(
+        t for t, is_found in zip(dramas["title"].tolist(), found) if not is_found
+    ))
+    fallback_info = dict(zip(missing_titles, get_additional_drama_infos(missing_titles)))
+    for record, is_found in zip(records, found):
+        if is_found:
+            continue
+        for column in cleaned_by_title.columns:
+            del record[column]
+        additional_info = fallback_info[record["title"]] or {}
+        for column in INFO_COLUMNS:
+            if column in additional_info:
+                record[column] = additional_info[column]
+
+    return records
+
+# --- Helper Function to Build Recommendation Entries ---
+def build_recommendations(recommended_pos_indices, drama_similarity_scores):
+    """
+    Builds response entries for the given positions in preprocessed_df
+    from the records joined at load.
+    Returns a list of recommendation dictionaries.
+    """
+    recommendations = []
+    for pos_idx, similarity_score in zip(recommended_pos_indices, drama_similarity_scores):
+        recommendation = dict(drama_records[pos_idx])
+        recommendation["similarity_score"] = similarity_score
+        recommendations.append(recommendation)
+    return recommendations
+
+# --- Helper Function to Precompute Default Responses ---
+def precompute_responses(n_recommendations):
+    """
+    Encodes the recommendation response body for every title in preprocessed_df.
+    Returns a dictionary mapping the normalized title to the orjson-encoded bytes.
+    """
+    n_titles = min(len(preprocessed_titles), top_neighbor_indices.shape[0])
+    recommendations = build_recommendations(
+        top_neighbor_indices[:n_titles, :n_recommendations].ravel().tolist(),
+        top_neighbor_scores[:n_titles, :n_recommendations].ravel().tolist(),
+    )
+
+    responses = {}
+    for pos_idx in range(n_titles):
+        key = preprocessed_normalized_titles[pos_idx]
+        # Duplicated titles resolve to their first occurrence, as in fuzzy matching
+        if not key or key in responses:
+            continue
+        start = pos_idx * n_recommendations
+        body = recommendations[start:start + n_recommendations]
+        responses[key] = orjson.dumps(body, option=ORJSON_OPTIONS)
+
+    return responses
+
+# --- Helper Function to Report a Match ---
+def report_match(title, match, accepted):
+    """
+    Logs how title was matched, using the title as the user typed it.
+    Returns the error message if the match was rejected (missing or scoring
+    below MATCH_THRESHOLD), or None if it was accepted.
+    """
+    if accepted:
+        if match is not None:
+            matched_title, score = match
+            print(f"Found match for '{title}': '{matched_title}' (Confidence: {score:.0f})")
+        return None
+
+    if not match:
+        error_msg = f"No match found for '{title}' in the dataset."
+    else:
+        matched_title, score = match
+        error_msg = f"No close match found for '{title}'. Closest match: '{matched_title}' (Confidence: {score:.0f}). Try a different title."
+    print(error_msg)
+    return error_msg
+
+# --- Recommendation Lookup ---
+def find_recommendations(title, n_recommendations):
     """
     Generates content-based recommendations for a given drama title.
+    Returns (result, status_code, match), where result is the recommendation
+    list or an error dictionary, and None if no title matched closely enough.
+    match is the (matched_title, score) tuple, or None if matching did not run
+    or found nothing.
     """
+    match = None
     try:
         if preprocessed_df is None or similarity_models is None or cleaned_df is None:
             error_msg = "Recommendation system not fully initialized. Required data not loaded."
             print(error_msg)
-            return {"error": error_msg}, 500
+            return {"error": error_msg}, 500, None
 
-        if "similarity_matrix" not in similarity_models:
+        if similarity_matrix is None:
             error_msg = "Similarity matrix not found in loaded models."
             print(error_msg)
-            return {"error": error_msg}, 400
-
-        similarity_matrix = similarity_models["similarity_matrix"]
+            return {"error": error_msg}, 400, None
 
         # Check if 'title' column exists
-        if "title" not in preprocessed_df.columns:
+        if preprocessed_titles is None:
             error_msg = "Preprocessed DataFrame missing 'title' column."
             print(error_msg)
-            return {"error": error_msg}, 500
+            return {"error": error_msg}, 500, None
 
-        # Use fuzzy matching to find the closest title
-        match = process.extractOne(title, preprocessed_df["title"].tolist())
+        if drama_records is None:
+            error_msg = "Recommendation entries not built. Clean dataset info could not be joined."
+            print(error_msg)
+            return {"error": error_msg}, 500, None
 
+        # Find the closest title, exact matches first
+        match = match_title(
+            title, preprocessed_titles, preprocessed_normalized_titles, preprocessed_title_lookup
+        )
+
+        # The caller reports missing and weak matches using the title as typed
         if not match:
-            error_msg = f"No match found for '{title}' in the dataset."
-            print(error_msg)
-            return {"error": error_msg}, 404
+            return None, 404, None
 
         matched_title, score = match
-        if score < 80:  # Threshold for a good match
-            error_msg = f"No close match found for '{title}'. Closest match: '{matched_title}' (Confidence: {score}). Try a different title."
-            print(error_msg)
-            return {"error": error_msg}, 404
-
-        print(f"Found match for '{title}': '{matched_title}' (Confidence: {score})")
+        if score < MATCH_THRESHOLD:  # Threshold for a good match
+            return None, 404, match
 
         # Get the positional index of the matched title
         try:
-            pos_idx = preprocessed_df.index.get_indexer_for(
-                preprocessed_df[preprocessed_df["title"] == matched_title].index
-            )[0]
+            pos_idx = title_to_pos[matched_title]
         except Exception as e:
             error_msg = f"Error finding index for matched title: {str(e)}"
             print(error_msg)
-            return {"error": error_msg}, 500
-
-        # Handle sparse matrices
-        if issparse(similarity_matrix):
-            similarity_matrix = similarity_matrix.toarray()
+            return {"error": error_msg}, 500, match
 
         # Check if index is within bounds
-        if pos_idx >= similarity_matrix.shape[0]:
-            error_msg = f"Index {pos_idx} out of bounds for similarity matrix (size: {similarity_matrix.shape[0]})"
+        if pos_idx >= similarity_matrix_rows:
+            error_msg = f"Index {pos_idx} out of bounds for similarity matrix (size: {similarity_matrix_rows})"
             print(error_msg)
-            return {"error": error_msg}, 500
+            return {"error": error_msg}, 500, match
+
+        # Serve from the precomputed neighbor table when it is deep enough
+        if (
+            top_neighbor_indices is not None
+            and 0 <= n_recommendations <= top_neighbor_indices.shape[1]
+        ):
+            recommended_pos_indices = top_neighbor_indices[pos_idx, :n_recommendations].tolist()
+            drama_similarity_scores = top_neighbor_scores[pos_idx, :n_recommendations].tolist()
+        else:
+            # Get similarity scores
+            try:
+                row = get_similarity_row(pos_idx)
+            except Exception as e:
+                error_msg = f"Error accessing similarity scores: {str(e)}"
+                print(error_msg)
+                return {"error": error_msg}, 500, match
+
+            # Get top N recommendations (excluding the drama itself)
+            top_indices, top_scores = top_k_row(row, n_recommendations, pos_idx)
+            recommended_pos_indices = top_indices.tolist()
+            drama_similarity_scores = top_scores.tolist()
+
+        final_recommendations = build_recommendations(
+            recommended_pos_indices, drama_similarity_scores
+        )
+        return final_recommendations, 200, match
 
-        # Get similarity scores
-        try:
-            sim_scores = list(enumerate(similarity_matrix[pos_idx]))
-        except Exception as e:
-            error_msg = f"Error accessing similarity scores: {str(e)}"
-            print(error_msg)
-            return {"error": error_msg}, 500
+    except Exception as e:
+        error_msg = f"Unexpected error in recommendation process: {str(e)}"
+        print(error_msg)
+        return {"error": error_msg}, 500, match
 
-        # Sort by similarity score
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+# --- Main Recommendation Function ---
+def get_recommendations_backend(title, n_recommendations=5):
+    """
+    Generates content-based recommendations for a given drama title.
+    """
+    result, status_code, match = find_recommendations(title, n_recommendations)
+    error_msg = report_match(title, match, result is not None)
+    if error_msg is not None:
+        return {"error": error_msg}, status_code
+    return result, status_code
 
-        # Get top N recommendations (excluding the drama itself)
-        sim_scores = sim_scores[1:n_recommendations + 1]
-        recommended_pos_indices = [i[0] for i in sim_scores]
-        drama_similarity_scores = [i[1] for i in sim_scores]
 
-        # Get recommended dramas from preprocessed data
-        recommended_dramas = preprocessed_df.iloc[recommended_pos_indices].copy()
-        recommended_dramas["similarity_score"] = drama_similarity_scores
+# --- Cached Recommendation Lookup ---
+class UncachedResult(Exception):
+    """Carries a recommend_memoized result that must not stay in the cache."""
 
-        # Enrich with data from clean dataset
-        final_recommendations = []
-        for _, row in recommended_dramas.iterrows():
-            drama_title = row['title']
-            additional_info = get_additional_drama_info(drama_title) or {}
-            
-            # Create the recommendation entry
-            recommendation = {
-                'title': drama_title,
-                'content_rating': row.get('content_rating', None),
-                'similarity_score': row['similarity_score']
-            }
-            
-            # Add available additional info
-            if 'rating' in additional_info:
-                recommendation['rating'] = additional_info['rating']
-            if 'genres' in additional_info:
-                recommendation['genres'] = additional_info['genres']
-            if 'original_network' in additional_info:
-                recommendation['original_network'] = additional_info['original_network']
-            
-            final_recommendations.append(recommendation)
 
-        return final_recommendations, 200
+@functools.lru_cache(maxsize=RECOMMENDATION_CACHE_SIZE)
+def recommend_memoized(normalized_title, n_recommendations):
+    """
+    Memoized find_recommendations for a title already passed through
+    rapidfuzz's default_process. Only 200 and 404 results are cached; any
+    other result is raised as UncachedResult, since lru_cache does not
+    store exceptions.
+    """
+    result, status_code, match = find_recommendations(normalized_title, n_recommendations)
+    body = None if result is None else orjson.dumps(result, option=ORJSON_OPTIONS)
+    if status_code not in (200, 404):
+        raise UncachedResult(body, status_code, match)
+    return body, status_code, match
 
-    except Exception as e:
-        error_msg = f"Unexpected error in recommendation process: {str(e)}"
-        print(error_msg)
-        return {"error": error_msg}, 500
+
+def recommend_cached(normalized_title, n_recommendations):
+    """
+    Returns the orjson-encoded response body, the status code and the match.
+    The body is None for a missing or weak match, whose error message the
+    caller builds from the title as typed.
+    """
+    try:
+        return recommend_memoized(normalized_title, n_recommendations)
+    except UncachedResult as e:
+        return e.args
+
+
+# Load resources at import time so `gunicorn --preload` loads them once in the
+# master process and workers share the memory copy-on-write
+load_resources()
 
 
 # --- Flask API Endpoint ---
@@ -254,10 +741,30 @@ def recommend_drama():
         return jsonify({"error": "Missing 'title' in request body."}), 400
 
     title = data["title"]
-    n_recommendations = data.get("n_recommendations", 5)  # Default to 5
+    n_recommendations = data.get("n_recommendations", DEFAULT_N_RECOMMENDATIONS)
+
+    if not isinstance(title, str):
+        return jsonify({"error": "'title' must be a string."}), 400
+    if not isinstance(n_recommendations, int) or isinstance(n_recommendations, bool):
+        return jsonify({"error": "'n_recommendations' must be an integer."}), 400
+    if n_recommendations < 0:
+        return jsonify({"error": "'n_recommendations' must not be negative."}), 400
+
+    normalized_title = default_process(title)
+
+    # Known titles at the default size are served from pre-encoded bodies
+    if n_recommendations == DEFAULT_N_RECOMMENDATIONS and precomputed_responses:
+        body = precomputed_responses.get(normalized_title)
+        if body is not None:
+            # Pre-encoded titles are exact matches, logged like any other match
+            report_match(title, (preprocessed_title_lookup[normalized_title], 100.0), True)
+            return Response(body, status=200, mimetype="application/json")
 
-    recommendations, status_code = get_recommendations_backend(title, n_recommendations)
-    return jsonify(recommendations), status_code
+    body, status_code, match = recommend_cached(normalized_title, n_recommendations)
+    error_msg = report_match(title, match, body is not None)
+    if error_msg is not None:
+        return jsonify({"error": error_msg}), status_code
+    return Response(body, status=status_code, mimetype="application/json")
 
 
 # --- Health Check Endpoint ---
@@ -272,11 +779,9 @@ def health_check():
         "dataframe_shape": preprocessed_df.shape
         if preprocessed_df is not None
         else "Not loaded",
-        "similarity_matrix_loaded": "similarity_matrix" in similarity_models
-        if similarity_models
-        else False,
-        "similarity_matrix_shape": similarity_models["similarity_matrix"].shape
-        if similarity_models and "similarity_matrix" in similarity_models
+        "similarity_matrix_loaded": similarity_matrix is not None,
+        "similarity_matrix_shape": similarity_matrix.shape
+        if similarity_matrix is not None
         else "Not loaded",
     }
     return jsonify(status), 200
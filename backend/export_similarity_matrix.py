@@ -0,0 +1,42 @@
+# export_similarity_matrix.py - One-time export of the similarity matrix to .npy
+#
+# np.load can memory-map .npy files, which makes backend start-up much faster
+# than unpickling the joblib model. Run from the backend/ directory:
+#     python export_similarity_matrix.py
+
+import joblib
+import numpy as np
+from scipy.sparse import issparse
+
+# --- Configuration ---
+# app.py imports the export paths below; MODEL_PATH must match app.py's
+MODEL_PATH = "../data/drama_recommender_v2.joblib"
+SIMILARITY_MATRIX_PATH = "../data/similarity_matrix.npy"
+SIMILARITY_CSR_PATH_TEMPLATE = "../data/similarity_matrix_{}.npy"
+
+
+def export_similarity_matrix():
+    """
+    Loads the similarity matrix from the joblib model and saves it as float32 .npy files.
+    Dense matrices are saved as a single array; sparse matrices as their CSR components.
+    """
+    loaded_obj = joblib.load(MODEL_PATH)
+    if isinstance(loaded_obj, dict):
+        matrix = loaded_obj["similarity_matrix"]
+    else:
+        matrix = loaded_obj
+
+    if issparse(matrix):
+        matrix = matrix.tocsr().astype(np.float32)
+        for part in ("data", "indices", "indptr"):
+            path = SIMILARITY_CSR_PATH_TEMPLATE.format(part)
+            np.save(path, getattr(matrix, part))
+            print(f"Saved CSR {part} to {path}")
+    else:
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        np.save(SIMILARITY_MATRIX_PATH, matrix)
+        print(f"Saved dense matrix {matrix.shape} to {SIMILARITY_MATRIX_PATH}")
+
+
+if __name__ == "__main__":
+    export_similarity_matrix()